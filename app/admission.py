@@ -0,0 +1,110 @@
+"""Admission control for API routes: bounded concurrency, load shedding and
+coalescing of identical in-flight requests."""
+import asyncio
+import math
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi.responses import JSONResponse
+from starlette.responses import Response
+
+Snapshot = Tuple[int, Dict[str, str], bytes]
+
+
+class RouteClass:
+    """A pool of `concurrency` slots with at most `max_queue` waiters.
+
+    Requests that find the queue full, or that wait longer than `timeout`
+    seconds for a slot, are shed with 503 and a Retry-After header.
+    """
+
+    def __init__(self, name: str, concurrency: int, max_queue: int, timeout: float):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.retry_after = max(1, math.ceil(timeout))
+        self._slots = asyncio.Semaphore(concurrency)
+        self.active = 0
+        self.queued = 0
+        self.admitted = 0
+        self.shed = 0
+        self.coalesced = 0
+        self._inflight: Dict[str, "asyncio.Future[Optional[Snapshot]]"] = {}
+
+    def _overloaded(self) -> Response:
+        self.shed += 1
+        return JSONResponse(
+            content={"detail": "Server busy, retry later"},
+            status_code=503,
+            headers={"Retry-After": str(self.retry_after)},
+        )
+
+    async def _acquire(self) -> bool:
+        """Take a slot, waiting in the bounded queue only if none is free."""
+        if not self._slots.locked():
+            # Returns without suspending, so nothing can slip in between.
+            await self._slots.acquire()
+            return True
+        if self.queued >= self.max_queue:
+            return False
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.queued -= 1
+        return True
+
+    async def run(self, handler: Callable[[], Awaitable[Response]]) -> Response:
+        if not await self._acquire():
+            return self._overloaded()
+        self.active += 1
+        self.admitted += 1
+        try:
+            return await handler()
+        finally:
+            self.active -= 1
+            self._slots.release()
+
+    async def run_coalesced(self, key: str, handler: Callable[[], Awaitable[Response]]) -> Response:
+        """Like `run`, but concurrent calls with the same key share one response."""
+        pending = self._inflight.get(key)
+        if pending is not None:
+            snapshot = await asyncio.shield(pending)
+            if snapshot is not None:
+                self.coalesced += 1
+                return _replay(snapshot)
+            # The leader failed; compute independently rather than share its error.
+            return await self.run(handler)
+
+        pending = asyncio.get_running_loop().create_future()
+        self._inflight[key] = pending
+        snapshot = None
+        try:
+            response = await self.run(handler)
+            if hasattr(response, "body_iterator"):
+                body = b"".join([chunk async for chunk in response.body_iterator])
+            else:
+                body = response.body
+            snapshot = (response.status_code, dict(response.headers), body)
+        finally:
+            del self._inflight[key]
+            pending.set_result(snapshot)
+        return _replay(snapshot)
+
+    def metrics(self) -> dict:
+        return {
+            "concurrency": self.concurrency,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queue_depth": self.queued,
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "coalesced": self.coalesced,
+        }
+
+
+def _replay(snapshot: Snapshot) -> Response:
+    status_code, headers, body = snapshot
+    return Response(content=body, status_code=status_code, headers=headers)
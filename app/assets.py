@@ -0,0 +1,101 @@
+"""Self-hosted static assets: versioned URLs, precompressed variants and
+long-lived cache headers.
+
+Run ``python -m app.assets`` after (re)building the CSS to write the ``.gz``
+and ``.br`` files next to each asset; the Docker build does this.
+"""
+import gzip
+import hashlib
+import os
+from functools import lru_cache
+from pathlib import Path
+from urllib.parse import parse_qs
+
+from starlette.datastructures import Headers
+from starlette.staticfiles import StaticFiles
+
+try:
+    import brotli
+except ImportError:  # .br variants are optional; gzip is always produced
+    brotli = None
+
+STATIC_DIR = Path("app/static")
+COMPRESSIBLE = {".css", ".js", ".svg", ".json", ".html"}
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+# Preferred first.
+_VARIANTS = (("br", ".br"), ("gzip", ".gz"))
+
+
+@lru_cache(maxsize=None)
+def _fingerprint(path: str) -> str:
+    return hashlib.sha256((STATIC_DIR / path).read_bytes()).hexdigest()[:12]
+
+
+def static_url(path: str) -> str:
+    """URL for a static file, busted by content hash so it can be cached forever."""
+    return f"/static/{path}?v={_fingerprint(path)}"
+
+
+def _accepted_encodings(headers: Headers) -> set:
+    accepted = set()
+    for item in headers.get("accept-encoding", "").split(","):
+        coding, _, params = item.partition(";")
+        _, _, q = params.strip().partition("q=")
+        try:
+            if q and float(q) == 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that serves ``<file>.br``/``<file>.gz`` when the client
+    accepts them, and marks URLs carrying the current fingerprint as immutable."""
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        accepted = _accepted_encodings(Headers(scope=scope))
+        for encoding, suffix in _VARIANTS:
+            if encoding not in accepted:
+                continue
+            try:
+                variant_stat = os.stat(f"{full_path}{suffix}")
+            except OSError:
+                continue
+            response = super().file_response(f"{full_path}{suffix}", variant_stat, scope, status_code)
+            if response.status_code != 304:
+                response.headers["content-encoding"] = encoding
+            break
+        else:
+            response = super().file_response(full_path, stat_result, scope, status_code)
+
+        response.headers["vary"] = "Accept-Encoding"
+        return response
+
+    async def get_response(self, path, scope):
+        response = await super().get_response(path, scope)
+        # Only a URL carrying the current content hash may be cached forever;
+        # stale or foreign ?v= values must revalidate.
+        versions = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("v")
+        if versions == [_fingerprint(Path(path).as_posix())]:
+            response.headers["cache-control"] = IMMUTABLE
+        else:
+            response.headers["cache-control"] = "no-cache"
+        return response
+
+
+def precompress(directory: Path = STATIC_DIR) -> None:
+    for path in sorted(directory.rglob("*")):
+        if not path.is_file() or path.suffix not in COMPRESSIBLE:
+            continue
+        data = path.read_bytes()
+        Path(f"{path}.gz").write_bytes(gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None:
+            Path(f"{path}.br").write_bytes(brotli.compress(data, quality=11))
+        print(f"Compressed {path}")
+
+
+if __name__ == "__main__":
+    precompress()
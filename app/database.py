@@ -1,14 +1,76 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, sessionmaker
 from app.config import settings
-from app.models import Base
+from app.models import Base, DataVersion
 
 engine = create_engine(settings.database_url)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Tables whose writes invalidate cached aggregates. Each has its own version,
+# bumped by triggers, so writes from seed.py, psql or other workers count too.
+COST_TABLES = ("cost_categories", "cost_articles", "cost_transactions")
+VERSIONED_TABLES = ("reminders",) + COST_TABLES
+
+
+def _create_version_triggers(conn):
+    if conn.dialect.name == "postgresql":
+        conn.execute(text(
+            "CREATE OR REPLACE FUNCTION bump_data_version() RETURNS trigger AS $$ "
+            "BEGIN UPDATE data_versions SET version = version + 1 WHERE table_name = TG_TABLE_NAME; "
+            "RETURN NULL; END $$ LANGUAGE plpgsql"
+        ))
+        for table in VERSIONED_TABLES:
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {table}_data_version ON {table}"))
+            conn.execute(text(
+                f"CREATE TRIGGER {table}_data_version "
+                f"AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} "
+                "FOR EACH STATEMENT EXECUTE FUNCTION bump_data_version()"
+            ))
+    elif conn.dialect.name == "sqlite":
+        for table in VERSIONED_TABLES:
+            for op in ("INSERT", "UPDATE", "DELETE"):
+                trigger = f"{table}_data_version_{op.lower()}"
+                conn.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+                conn.execute(text(
+                    f"CREATE TRIGGER {trigger} AFTER {op} ON {table} BEGIN "
+                    f"UPDATE data_versions SET version = version + 1 WHERE table_name = '{table}'; END"
+                ))
+
+
+def _insert_versions(conn):
+    rows = [{"table_name": table, "version": 0} for table in VERSIONED_TABLES]
+    if conn.dialect.name == "postgresql":
+        conn.execute(postgresql.insert(DataVersion).on_conflict_do_nothing(), rows)
+    elif conn.dialect.name == "sqlite":
+        conn.execute(sqlite.insert(DataVersion).on_conflict_do_nothing(), rows)
+    else:
+        existing = set(conn.execute(select(DataVersion.table_name)).scalars())
+        missing = [row for row in rows if row["table_name"] not in existing]
+        if missing:
+            conn.execute(DataVersion.__table__.insert(), missing)
+
 
 def create_db_and_tables():
-    Base.metadata.create_all(engine)
+    # One transaction for schema, version rows and triggers, so workers starting
+    # together cannot interleave (Postgres serialises them on an advisory lock;
+    # SQLite on its write lock).
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('create_db_and_tables'))"))
+        Base.metadata.create_all(conn)
+        _insert_versions(conn)
+        _create_version_triggers(conn)
+
+
+def version_query(tables=VERSIONED_TABLES):
+    """SELECT of the combined version of `tables`, for embedding in larger reads."""
+    return select(func.coalesce(func.sum(DataVersion.version), 0)).where(DataVersion.table_name.in_(tables))
+
+
+def data_version(db: Session, tables=VERSIONED_TABLES) -> int:
+    """Current version of `tables`; changes whenever any of them is written."""
+    return db.execute(version_query(tables)).scalar()
 
 
 def get_db():
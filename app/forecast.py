@@ -0,0 +1,330 @@
+"""Vectorized budget forecasting over cost articles and categories.
+
+Spend is loaded once per data version into columnar NumPy arrays; every
+forecast (including what-if scenarios) is then pure array arithmetic.
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import BigInteger, Integer, Text, cast, select, true
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.functions import FunctionElement
+
+from .database import COST_TABLES, data_version, version_query
+from .models import CostCategory, CostArticle, CostTransaction
+
+_EPOCH = date(1970, 1, 1)
+_NO_DAY = np.iinfo(np.int64).min
+
+
+class UnknownCategoryError(LookupError):
+    """A what-if adjustment names a category that does not exist."""
+
+
+@dataclass(frozen=True)
+class SpendFrame:
+    """Columnar snapshot of budgets and spend."""
+    version: int
+    # Categories, sorted by id.
+    category_id: np.ndarray
+    category_name: List[str]
+    category_budget: np.ndarray  # NaN when not budgeted
+    # Articles, sorted by id.
+    article_id: np.ndarray
+    article_category: np.ndarray  # index into the category arrays
+    article_budget: np.ndarray  # NaN when not budgeted
+    # Transactions, sorted by (article, day).
+    txn_article: np.ndarray  # index into the article arrays
+    txn_day: np.ndarray  # days since 1970-01-01
+    txn_amount: np.ndarray
+    txn_category_order: np.ndarray  # permutation of the above sorting by (category, day)
+
+
+@dataclass(frozen=True)
+class Forecast:
+    """Per-article and per-category forecast arrays, aligned with a SpendFrame."""
+    frame: SpendFrame
+    as_of: date
+    until: date
+    article_spent: np.ndarray
+    article_burn_rate: np.ndarray
+    article_projected: np.ndarray
+    article_overrun_day: np.ndarray  # _NO_DAY when no overrun by `until`
+    category_spent: np.ndarray
+    category_burn_rate: np.ndarray
+    category_projected: np.ndarray
+    category_overrun_day: np.ndarray
+
+
+def _to_day(d: date) -> int:
+    return (d - _EPOCH).days
+
+
+def to_date(day: int) -> Optional[date]:
+    if day == _NO_DAY:
+        return None
+    return _EPOCH + timedelta(days=int(day))
+
+
+class epoch_days(FunctionElement):
+    """Days since 1970-01-01 of a DATE column, computed by the database."""
+    type = Integer()
+    inherit_cache = True
+
+
+@compiles(epoch_days)
+def _compile_epoch_days(element, compiler, **kw):
+    return f"({compiler.process(element.clauses, **kw)} - DATE '1970-01-01')"
+
+
+@compiles(epoch_days, "sqlite")
+def _compile_epoch_days_sqlite(element, compiler, **kw):
+    return f"CAST(julianday({compiler.process(element.clauses, **kw)}) - 2440587.5 AS INTEGER)"
+
+
+class concat_agg(FunctionElement):
+    """Comma-separated text of a numeric column over all rows, NULL as 'nan'.
+
+    The driver hands back one string per column instead of one tuple per row,
+    and NumPy parses it in C.
+    """
+    type = Text()
+    inherit_cache = True
+
+
+@compiles(concat_agg)
+def _compile_concat_agg(element, compiler, **kw):
+    return f"string_agg(coalesce(CAST({compiler.process(element.clauses, **kw)} AS TEXT), 'nan'), ',')"
+
+
+@compiles(concat_agg, "sqlite")
+def _compile_concat_agg_sqlite(element, compiler, **kw):
+    return f"group_concat(ifnull({compiler.process(element.clauses, **kw)}, 'nan'), ',')"
+
+
+def _parse(values: Optional[str], dtype=np.float64) -> np.ndarray:
+    if not values:  # aggregating zero rows gives NULL
+        return np.empty(0, dtype=dtype)
+    return np.fromstring(values, dtype=dtype, sep=",")
+
+
+# Transactions are fetched as (article_id << _DAY_BITS | day, amount): one
+# fewer column to aggregate, and the packed key sorts by (article, day)
+# directly. Days fit in 20 bits until the year 4840.
+_DAY_BITS = 20
+
+
+def _group_order(group: np.ndarray, day: np.ndarray) -> np.ndarray:
+    """Permutation sorting rows by (group, day), via one packed-int argsort."""
+    if not len(day):
+        return np.empty(0, dtype=np.int64)
+    return np.argsort((group.astype(np.int64) << _DAY_BITS) | day)
+
+
+def _index_of(ids: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Position of each of `values` in the sorted, unique `ids`; -1 if absent.
+
+    Serial ids are usually dense, so a direct id -> index table is used; when
+    they are sparse (a few rows with huge ids) it falls back to binary search.
+    """
+    if not len(ids):
+        return np.full(len(values), -1, dtype=np.int64)
+    if ids[0] >= 0 and ids[-1] < 4 * len(ids) + 1024:
+        table = np.full(ids[-1] + 1, -1, dtype=np.int64)
+        table[ids] = np.arange(len(ids))
+        inside = (values >= 0) & (values <= ids[-1])
+        return np.where(inside, table[np.where(inside, values, 0)], -1)
+    pos = np.minimum(np.searchsorted(ids, values), len(ids) - 1)
+    return np.where(ids[pos] == values, pos, -1)
+
+
+def load_frame(db: Session) -> SpendFrame:
+    """Read budgets and the full spend time series into columnar arrays.
+
+    The version, articles and transactions come from a single statement, so
+    they are one consistent snapshot. Each column arrives as one text
+    aggregate, with transaction dates already packed with their article id
+    into a sortable key; parsing, sorting and joining happen in NumPy. Rows
+    pointing at an article or category that is not loaded are dropped.
+    """
+    # Aggregates in the same subquery consume the same rows in the same order,
+    # so columns of one table stay aligned.
+    version = version_query(COST_TABLES).subquery()
+    articles = select(
+        concat_agg(CostArticle.id).label("id"),
+        concat_agg(CostArticle.category_id).label("category_id"),
+        concat_agg(CostArticle.budgeted_amount).label("budget"),
+    ).subquery()
+    packed_key = (cast(CostTransaction.article_id, BigInteger) * (1 << _DAY_BITS)
+                  + epoch_days(CostTransaction.transaction_date))
+    txns = select(
+        concat_agg(packed_key).label("key"),
+        concat_agg(CostTransaction.amount).label("amount"),
+    ).subquery()
+    row = db.execute(
+        select(version, articles, txns)
+        .select_from(version).join(articles, true()).join(txns, true())
+    ).one()
+    categories = db.execute(
+        select(CostCategory.id, CostCategory.name, CostCategory.budgeted_total).order_by(CostCategory.id)
+    ).all()
+
+    category_id = np.array([c.id for c in categories], dtype=np.int64)
+
+    article_id = _parse(row.id, np.int64)
+    by_id = np.argsort(article_id)
+    article_id = article_id[by_id]
+    article_category = _index_of(category_id, _parse(row.category_id, np.int64)[by_id])
+    article_budget = _parse(row.budget)[by_id]
+    known = article_category >= 0
+    article_id, article_category, article_budget = article_id[known], article_category[known], article_budget[known]
+
+    key = _parse(row.key, np.int64)
+    order = np.argsort(key)
+    key = key[order]
+    txn_article = _index_of(article_id, key >> _DAY_BITS)
+    known = txn_article >= 0
+    txn_article = txn_article[known]
+    txn_day = key[known] & ((1 << _DAY_BITS) - 1)
+
+    return SpendFrame(
+        version=row[0],
+        category_id=category_id,
+        category_name=[c.name for c in categories],
+        category_budget=np.array([c.budgeted_total for c in categories], dtype=float),
+        article_id=article_id,
+        article_category=article_category,
+        article_budget=article_budget,
+        txn_article=txn_article,
+        txn_day=txn_day,
+        txn_amount=_parse(row.amount)[order][known],
+        txn_category_order=_group_order(article_category[txn_article], txn_day),
+    )
+
+
+def _first_crossing(group: np.ndarray, day: np.ndarray, amount: np.ndarray,
+                    threshold: np.ndarray) -> np.ndarray:
+    """Day on which each group's running total first exceeds its threshold.
+
+    Inputs must be sorted by (group, day). Groups that never cross get _NO_DAY.
+    """
+    result = np.full(len(threshold), _NO_DAY, dtype=np.int64)
+    if not len(group):
+        return result
+    running = np.cumsum(amount)
+    starts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+    before = running[starts] - amount[starts]
+    running -= np.repeat(before, np.diff(np.r_[starts, len(group)]))
+    with np.errstate(invalid="ignore"):
+        crossed = np.flatnonzero(running > threshold[group])
+    crossed_groups, first = np.unique(group[crossed], return_index=True)
+    result[crossed_groups] = day[crossed[first]]
+    return result
+
+
+def _projected_overrun(overrun_day: np.ndarray, budget: np.ndarray, spent: np.ndarray,
+                       burn_rate: np.ndarray, as_of_day: int, until_day: int) -> np.ndarray:
+    """Fill in future overrun days for budgets not yet exceeded at `as_of`."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # First whole day on which spend is strictly over budget, matching _first_crossing.
+        days_left = np.floor((budget - spent) / burn_rate) + 1
+        pending = (overrun_day == _NO_DAY) & (burn_rate > 0) & (as_of_day + days_left <= until_day)
+    result = overrun_day.copy()
+    result[pending] = as_of_day + days_left[pending].astype(np.int64)
+    return result
+
+
+def compute(frame: SpendFrame, as_of: date, until: date, window_days: int,
+            adjustments: Dict[str, float]) -> Forecast:
+    """Project spend to `until` at the trailing `window_days` burn rate.
+
+    `adjustments` maps category names to a percentage applied to future spend
+    in that category, e.g. {"Empreiteiro": 10.0} for "+10% on Empreiteiro".
+    """
+    multiplier = np.ones(len(frame.category_id))
+    for name, pct in adjustments.items():
+        try:
+            multiplier[frame.category_name.index(name)] = 1.0 + pct / 100.0
+        except ValueError:
+            raise UnknownCategoryError(f"Unknown category: {name}") from None
+
+    as_of_day, until_day = _to_day(as_of), _to_day(until)
+    n_articles = len(frame.article_id)
+    n_categories = len(frame.category_id)
+
+    # Transactions dated after as_of have not happened yet from the forecast's point of view.
+    seen = frame.txn_day <= as_of_day
+    txn_article = frame.txn_article[seen]
+    txn_day = frame.txn_day[seen]
+    txn_amount = frame.txn_amount[seen]
+    recent = txn_day > as_of_day - window_days
+
+    article_spent = np.bincount(txn_article, weights=txn_amount, minlength=n_articles)
+    article_burn_rate = np.bincount(
+        txn_article[recent], weights=txn_amount[recent], minlength=n_articles
+    ) / window_days * multiplier[frame.article_category]
+    article_projected = article_spent + article_burn_rate * max(0, until_day - as_of_day)
+    article_overrun_day = _projected_overrun(
+        _first_crossing(txn_article, txn_day, txn_amount, frame.article_budget),
+        frame.article_budget, article_spent, article_burn_rate, as_of_day, until_day,
+    )
+
+    order = frame.txn_category_order[seen[frame.txn_category_order]]
+    category_spent = np.bincount(frame.article_category, weights=article_spent, minlength=n_categories)
+    category_burn_rate = np.bincount(frame.article_category, weights=article_burn_rate, minlength=n_categories)
+    category_projected = np.bincount(frame.article_category, weights=article_projected, minlength=n_categories)
+    category_overrun_day = _projected_overrun(
+        _first_crossing(frame.article_category[frame.txn_article[order]], frame.txn_day[order],
+                        frame.txn_amount[order], frame.category_budget),
+        frame.category_budget, category_spent, category_burn_rate, as_of_day, until_day,
+    )
+
+    return Forecast(
+        frame=frame,
+        as_of=as_of,
+        until=until,
+        article_spent=article_spent,
+        article_burn_rate=article_burn_rate,
+        article_projected=article_projected,
+        article_overrun_day=article_overrun_day,
+        category_spent=category_spent,
+        category_burn_rate=category_burn_rate,
+        category_projected=category_projected,
+        category_overrun_day=category_overrun_day,
+    )
+
+
+# --- Caching ---
+_lock = threading.Lock()
+_frame: Optional[SpendFrame] = None
+_forecasts: "OrderedDict[tuple, Forecast]" = OrderedDict()
+_MAX_CACHED_FORECASTS = 32
+
+
+def get_forecast(db: Session, as_of: date, until: date, window_days: int,
+                 adjustments: Dict[str, float]) -> Forecast:
+    """Cached `compute`, invalidated whenever a cost table is written."""
+    global _frame
+    version = data_version(db, COST_TABLES)
+    key = (version, as_of, until, window_days, tuple(sorted(adjustments.items())))
+    with _lock:
+        if key in _forecasts:
+            _forecasts.move_to_end(key)
+            return _forecasts[key]
+        frame = _frame if _frame is not None and _frame.version == version else None
+    if frame is None:
+        frame = load_frame(db)
+        with _lock:
+            _frame = frame
+            _forecasts.clear()
+    result = compute(frame, as_of, until, window_days, adjustments)
+    with _lock:
+        _forecasts[key] = result
+        while len(_forecasts) > _MAX_CACHED_FORECASTS:
+            _forecasts.popitem(last=False)
+    return result
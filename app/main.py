@@ -1,8 +1,9 @@
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
-from fastapi.staticfiles import StaticFiles
 from app.database import create_db_and_tables
 from app.config import settings
+from app.admission import RouteClass
+from app.assets import PrecompressedStaticFiles
 
 from app.routers import costs, reminders, dashboard, ui
 
@@ -18,6 +19,33 @@ def on_startup():
     create_db_and_tables()
 
 
+# Aggregate endpoints and the server-rendered pages built from them get a small
+# pool of their own so they cannot starve CRUD calls.
+HEAVY_ROUTES = {
+    "/api/dashboard/overview", "/api/costs/summary", "/api/costs/forecast",
+    "/", "/costs", "/reminders",
+}
+UNLIMITED_ROUTES = {"/api/health", "/api/metrics"}
+
+heavy_routes = RouteClass("heavy", settings.heavy_concurrency, settings.heavy_max_queue, settings.heavy_timeout)
+light_routes = RouteClass("light", settings.light_concurrency, settings.light_max_queue, settings.light_timeout)
+
+
+# Declared before api_key_middleware so it runs inside it: unauthenticated
+# requests are rejected before they take a slot or join a coalesced request.
+@app.middleware("http")
+async def admission_middleware(request: Request, call_next):
+    path = request.url.path
+    if path in HEAVY_ROUTES:
+        if request.method == "GET":
+            key = f"{path}?{request.url.query}"
+            return await heavy_routes.run_coalesced(key, lambda: call_next(request))
+        return await heavy_routes.run(lambda: call_next(request))
+    if not path.startswith("/api/") or path in UNLIMITED_ROUTES:
+        return await call_next(request)
+    return await light_routes.run(lambda: call_next(request))
+
+
 @app.middleware("http")
 async def api_key_middleware(request: Request, call_next):
     if request.url.path.startswith("/api/") and request.url.path != "/api/health":
@@ -32,10 +60,16 @@ async def health_check():
     return {"status": "ok"}
 
 
+@app.get("/api/metrics", tags=["monitoring"])
+async def metrics():
+    return {"admission": {rc.name: rc.metrics() for rc in (heavy_routes, light_routes)}}
+
+
 # API routers
 app.include_router(costs.router, prefix="/api")
 app.include_router(reminders.router, prefix="/api")
 app.include_router(dashboard.router, prefix="/api")
 
 # UI
+app.mount("/static", PrecompressedStaticFiles(directory="app/static"), name="static")
 app.include_router(ui.router)
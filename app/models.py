@@ -67,3 +67,11 @@ class CostTransaction(Base):
     created_at: Mapped[datetime] = Column(DateTime, default=func.now(), nullable=False)
 
     article: Mapped["CostArticle"] = relationship(back_populates="transactions")
+
+
+class DataVersion(Base):
+    """Per-table write counters, bumped by database triggers on every write to the tables above."""
+    __tablename__ = "data_versions"
+
+    table_name: Mapped[str] = Column(String, primary_key=True)
+    version: Mapped[int] = Column(Integer, default=0, nullable=False)
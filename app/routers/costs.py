@@ -1,5 +1,7 @@
-from typing import List, Optional
-from datetime import date, datetime
+from typing import Dict, List, Optional
+from datetime import date, datetime, timedelta
+
+import numpy as np
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
@@ -7,6 +9,7 @@ from sqlalchemy.orm import Session
 from ..database import get_db
 from ..models import CostCategory, CostArticle, CostTransaction
 from ..auth import get_api_key
+from .. import forecast
 
 router = APIRouter(prefix="/costs", tags=["costs"], dependencies=[Depends(get_api_key)])
 
@@ -268,3 +271,124 @@ def get_summary(db: Session = Depends(get_db)):
         total_without_invoice=total_no_invoice,
         categories=cat_summaries,
     )
+
+
+# --- Forecast ---
+class ArticleForecast(BaseModel):
+    id: int
+    category_id: int
+    name: str
+    budgeted_amount: Optional[float]
+    spent: float
+    variance: Optional[float]
+    percent_consumed: Optional[float]
+    burn_rate_per_day: float
+    projected_cost: float
+    projected_variance: Optional[float]
+    overrun_date: Optional[date]
+
+class CategoryForecast(BaseModel):
+    id: int
+    name: str
+    budgeted_total: Optional[float]
+    spent: float
+    variance: Optional[float]
+    percent_consumed: Optional[float]
+    burn_rate_per_day: float
+    projected_cost: float
+    projected_variance: Optional[float]
+    overrun_date: Optional[date]
+
+class CostForecast(BaseModel):
+    data_version: int
+    as_of: date
+    until: date
+    window_days: int
+    adjustments: Dict[str, float]
+    categories: List[CategoryForecast]
+    articles: List[ArticleForecast]
+
+def _parse_adjustments(adjust: List[str]) -> Dict[str, float]:
+    adjustments = {}
+    for item in adjust:
+        name, sep, pct = item.rpartition(":")
+        try:
+            if not sep or not name:
+                raise ValueError
+            adjustments[name] = float(pct)
+        except ValueError:
+            raise HTTPException(status_code=422, detail=f"Invalid adjustment '{item}', expected 'Category:percent'")
+    return adjustments
+
+def _budget_columns(budget: np.ndarray, spent: np.ndarray, projected: np.ndarray):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percent = np.where(budget > 0, spent / budget * 100, np.nan)
+    return budget - spent, percent, budget - projected
+
+def _nullable(values: np.ndarray) -> list:
+    return [None if v != v else round(v, 2) for v in values.tolist()]
+
+@router.get("/forecast", response_model=CostForecast)
+def get_forecast(
+    db: Session = Depends(get_db),
+    as_of: Optional[date] = None,
+    horizon_days: int = Query(180, ge=0),
+    window_days: int = Query(90, ge=1),
+    adjust: List[str] = Query([], description="What-if scenario, e.g. 'Empreiteiro:+10' for +10% future spend"),
+    limit: int = Query(50, ge=0, description="Number of articles returned, worst projected overrun first"),
+):
+    """Budget variance and burn-rate projection for every category and article."""
+    as_of = as_of or date.today()
+    until = as_of + timedelta(days=horizon_days)
+    adjustments = _parse_adjustments(adjust)
+    try:
+        fc = forecast.get_forecast(db, as_of, until, window_days, adjustments)
+    except forecast.UnknownCategoryError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    frame = fc.frame
+
+    cat_variance, cat_percent, cat_proj_variance = _budget_columns(
+        frame.category_budget, fc.category_spent, fc.category_projected)
+    categories = [
+        CategoryForecast(
+            id=cat_id, name=name, budgeted_total=budgeted, spent=spent, variance=variance,
+            percent_consumed=percent, burn_rate_per_day=burn, projected_cost=projected,
+            projected_variance=proj_variance, overrun_date=forecast.to_date(day),
+        )
+        for cat_id, name, budgeted, spent, variance, percent, burn, projected, proj_variance, day in zip(
+            frame.category_id.tolist(), frame.category_name, _nullable(frame.category_budget),
+            np.round(fc.category_spent, 2).tolist(), _nullable(cat_variance), _nullable(cat_percent),
+            np.round(fc.category_burn_rate, 2).tolist(), np.round(fc.category_projected, 2).tolist(),
+            _nullable(cat_proj_variance), fc.category_overrun_day.tolist(),
+        )
+    ]
+
+    art_variance, art_percent, art_proj_variance = _budget_columns(
+        frame.article_budget, fc.article_spent, fc.article_projected)
+    # Worst projected overrun first; unbudgeted articles sort last.
+    top = np.argsort(np.nan_to_num(art_proj_variance, nan=np.inf), kind="stable")[:limit]
+    names = dict(db.query(CostArticle.id, CostArticle.name).filter(CostArticle.id.in_(frame.article_id[top].tolist())))
+    articles = [
+        ArticleForecast(
+            id=art_id, category_id=cat_id, name=names.get(art_id, ""), budgeted_amount=budgeted,
+            spent=spent, variance=variance, percent_consumed=percent, burn_rate_per_day=burn,
+            projected_cost=projected, projected_variance=proj_variance, overrun_date=forecast.to_date(day),
+        )
+        for art_id, cat_id, budgeted, spent, variance, percent, burn, projected, proj_variance, day in zip(
+            frame.article_id[top].tolist(), frame.category_id[frame.article_category[top]].tolist(),
+            _nullable(frame.article_budget[top]), np.round(fc.article_spent[top], 2).tolist(),
+            _nullable(art_variance[top]), _nullable(art_percent[top]),
+            np.round(fc.article_burn_rate[top], 2).tolist(), np.round(fc.article_projected[top], 2).tolist(),
+            _nullable(art_proj_variance[top]), fc.article_overrun_day[top].tolist(),
+        )
+    ]
+
+    return CostForecast(
+        data_version=frame.version,
+        as_of=as_of,
+        until=until,
+        window_days=window_days,
+        adjustments=adjustments,
+        categories=categories,
+        articles=articles,
+    )
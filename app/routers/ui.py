@@ -1,19 +1,133 @@
-from fastapi import APIRouter, Request
-from fastapi.responses import HTMLResponse
+import math
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
+from markupsafe import Markup
+from sqlalchemy.orm import Session, joinedload
+
+from ..assets import static_url
+from ..database import COST_TABLES, VERSIONED_TABLES, get_db, data_version
+from ..models import CostCategory, CostArticle, CostTransaction, Reminder, ReminderStatus
+from .dashboard import get_overview
 
 router = APIRouter()
 templates = Jinja2Templates(directory="app/templates")
 
+PAGE_SIZE = 25
+
+
+def format_eur(value: Optional[float]) -> str:
+    """€1.234,56 / -€1.234,56: dot thousands separator, comma decimals."""
+    if value is None:
+        return "-"
+    sign = "-" if round(value, 2) < 0 else ""
+    return sign + "€" + f"{abs(value):,.2f}".replace(",", " ").replace(".", ",").replace(" ", ".")
+
+templates.env.filters["eur"] = format_eur
+templates.env.globals["static_url"] = static_url
+
+
+# --- Fragment cache ---
+# Rendered fragments keyed by (template, params, version of the tables they
+# read); a write makes new keys and the stale ones age out, least recently
+# used first.
+_fragment_lock = threading.Lock()
+_fragments: "OrderedDict[Tuple, str]" = OrderedDict()
+_MAX_FRAGMENTS = 256
+
+
+def render_fragment(db: Session, template: str, params: Tuple, context: Callable[[], dict],
+                    tables: Tuple[str, ...] = VERSIONED_TABLES) -> Markup:
+    key = (template, params, data_version(db, tables))
+    with _fragment_lock:
+        html = _fragments.get(key)
+        if html is not None:
+            _fragments.move_to_end(key)
+    if html is None:
+        html = templates.get_template(template).render(context())
+        with _fragment_lock:
+            _fragments[key] = html
+            while len(_fragments) > _MAX_FRAGMENTS:
+                _fragments.popitem(last=False)
+    return Markup(html)
+
+
+class PageOutOfRange(Exception):
+    """Requested page is past the last one; raised before anything is cached."""
+
+    def __init__(self, pages: int):
+        self.pages = pages
+
+
+def _paginate(q, page: int) -> dict:
+    total = q.count()
+    pages = max(1, math.ceil(total / PAGE_SIZE))
+    if page > pages:
+        raise PageOutOfRange(pages)
+    return {
+        "items": q.offset((page - 1) * PAGE_SIZE).limit(PAGE_SIZE).all(),
+        "page": page,
+        "pages": pages,
+        "total": total,
+    }
+
+
+def _last_page(request: Request, e: PageOutOfRange) -> RedirectResponse:
+    url = request.url.include_query_params(page=e.pages)
+    return RedirectResponse(f"{url.path}?{url.query}", status_code=303)
+
 
 @router.get("/", response_class=HTMLResponse)
-async def index(request: Request):
-    return templates.TemplateResponse("index.html", {"request": request})
+def index(request: Request, db: Session = Depends(get_db)):
+    dashboard = render_fragment(db, "fragments/dashboard.html", (), lambda: {"overview": get_overview(db)})
+    return templates.TemplateResponse(request, "index.html", {"dashboard": dashboard})
 
 @router.get("/costs", response_class=HTMLResponse)
-async def costs_page(request: Request):
-    return templates.TemplateResponse("costs.html", {"request": request})
+def costs_page(
+    request: Request,
+    db: Session = Depends(get_db),
+    page: int = Query(1, ge=1),
+    category_id: Optional[int] = None,
+):
+    def context():
+        q = (
+            db.query(CostTransaction)
+            .options(joinedload(CostTransaction.article).joinedload(CostArticle.category))
+            .order_by(CostTransaction.transaction_date.desc(), CostTransaction.id.desc())
+        )
+        if category_id:
+            q = q.join(CostArticle).filter(CostArticle.category_id == category_id)
+        return {
+            "categories": db.query(CostCategory).order_by(CostCategory.name).all(),
+            "category_id": category_id,
+            **_paginate(q, page),
+        }
+
+    try:
+        transactions = render_fragment(db, "fragments/transactions.html", (page, category_id), context, COST_TABLES)
+    except PageOutOfRange as e:
+        return _last_page(request, e)
+    return templates.TemplateResponse(request, "costs.html", {"transactions": transactions})
 
 @router.get("/reminders", response_class=HTMLResponse)
-async def reminders_page(request: Request):
-    return templates.TemplateResponse("reminders.html", {"request": request})
+def reminders_page(
+    request: Request,
+    db: Session = Depends(get_db),
+    page: int = Query(1, ge=1),
+    status: Optional[ReminderStatus] = None,
+):
+    def context():
+        q = db.query(Reminder).order_by(Reminder.due_at.is_(None), Reminder.due_at, Reminder.id.desc())
+        if status:
+            q = q.filter(Reminder.status == status)
+        return {"statuses": list(ReminderStatus), "status": status, **_paginate(q, page)}
+
+    try:
+        reminders = render_fragment(db, "fragments/reminders.html", (page, status), context, ("reminders",))
+    except PageOutOfRange as e:
+        return _last_page(request, e)
+    return templates.TemplateResponse(request, "reminders.html", {"reminders": reminders})
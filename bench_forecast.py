@@ -0,0 +1,79 @@
+"""Time the cold /api/costs/forecast path on a seeded 100k-article database.
+
+Always runs against a throwaway database (BENCH_DATABASE_URL, default a
+temporary SQLite file), never the one configured for the app. Exits non-zero
+if the median cold path exceeds the budget.
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, '.')
+os.environ["DATABASE_URL"] = os.environ.get(
+    "BENCH_DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+)
+
+from app.database import SessionLocal, create_db_and_tables, engine
+from app.models import CostCategory, CostArticle, CostTransaction
+from app import forecast
+
+CATEGORIES = 20
+ARTICLES = 100_000
+TRANSACTIONS = 500_000
+BUDGET_SECONDS = 1.0
+RUNS = 5
+
+create_db_and_tables()
+random.seed(0)
+start = date(2025, 1, 1)
+with engine.begin() as conn:
+    conn.execute(CostCategory.__table__.insert(), [
+        {"id": i + 1, "name": f"Categoria {i}", "budgeted_total": 2_000_000.0} for i in range(CATEGORIES)
+    ])
+    conn.execute(CostArticle.__table__.insert(), [
+        {"id": i + 1, "category_id": i % CATEGORIES + 1, "name": f"Artigo {i}", "budgeted_amount": 1000.0}
+        for i in range(ARTICLES)
+    ])
+    conn.execute(CostTransaction.__table__.insert(), [
+        {
+            "article_id": random.randrange(ARTICLES) + 1,
+            "transaction_date": start + timedelta(days=random.randrange(365)),
+            "payment_method": "Transferência",
+            "amount": round(random.random() * 300, 2),
+            "has_invoice": False,
+        }
+        for _ in range(TRANSACTIONS)
+    ])
+
+db = SessionLocal()
+as_of = date(2025, 12, 31)
+
+scenario = (as_of, as_of + timedelta(days=180), 90, {"Categoria 1": 10.0})
+loads, colds = [], []
+for _ in range(RUNS):
+    t = time.perf_counter()
+    frame = forecast.load_frame(db)
+    loads.append(time.perf_counter() - t)
+
+    forecast._frame = None
+    forecast._forecasts.clear()
+    t = time.perf_counter()
+    forecast.get_forecast(db, *scenario)
+    colds.append(time.perf_counter() - t)
+
+t = time.perf_counter()
+forecast.get_forecast(db, *scenario)
+warm = time.perf_counter() - t
+db.close()
+
+load, cold = statistics.median(loads), statistics.median(colds)
+print(f"{len(frame.article_id)} articles, {len(frame.txn_day)} transactions")
+print(f"median of {RUNS}: load_frame: {load:.3f}s  cold forecast: {cold:.3f}s  "
+      f"(worst {max(colds):.3f}s)  warm forecast: {warm:.3f}s")
+if cold > BUDGET_SECONDS:
+    print(f"FAIL: cold forecast over {BUDGET_SECONDS}s budget")
+    sys.exit(1)
@@ -0,0 +1,40 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.chdir(ROOT)  # templates and static files are resolved relative to the repo root
+
+# Point the app at a throwaway SQLite database before anything imports it.
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test.db"
+os.environ["API_KEY"] = "test-key"
+
+import pytest
+
+from app.database import SessionLocal, create_db_and_tables, engine
+from app.models import Base, DataVersion
+
+create_db_and_tables()
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    yield session
+    session.close()
+    # Versions only ever go up, so caches keyed on them stay valid across tests.
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            if table is not DataVersion.__table__:
+                conn.execute(table.delete())
+
+
+@pytest.fixture
+def client(db):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app, headers={"X-API-Key": "test-key"}) as client:
+        yield client
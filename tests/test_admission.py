@@ -0,0 +1,169 @@
+import asyncio
+
+import pytest
+from starlette.responses import JSONResponse, StreamingResponse
+
+from app.admission import RouteClass
+
+
+class Handler:
+    """Counts calls and blocks each one until `release` is set."""
+
+    def __init__(self, fail_first=False, streaming=False):
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.fail_first = fail_first
+        self.streaming = streaming
+
+    async def __call__(self):
+        self.calls += 1
+        call = self.calls
+        await self.release.wait()
+        if self.fail_first and call == 1:
+            raise RuntimeError("boom")
+        if self.streaming:
+            return StreamingResponse(iter([b'{"call": ', str(call).encode(), b"}"]), media_type="application/json")
+        return JSONResponse({"call": call})
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def assert_no_leaks(routes):
+    assert routes.active == 0
+    assert routes.queued == 0
+    assert routes._slots._value == routes.concurrency
+    assert routes._inflight == {}
+
+
+def test_sheds_when_queue_full():
+    async def scenario():
+        routes = RouteClass("test", concurrency=1, max_queue=1, timeout=5)
+        handler = Handler()
+        running = asyncio.create_task(routes.run(handler))
+        waiting = asyncio.create_task(routes.run(handler))
+        await settle()
+        assert (routes.active, routes.queued) == (1, 1)
+
+        shed = await routes.run(handler)
+        assert shed.status_code == 503
+        assert shed.headers["retry-after"] == "5"
+
+        handler.release.set()
+        assert [r.status_code for r in await asyncio.gather(running, waiting)] == [200, 200]
+        assert (routes.admitted, routes.shed, handler.calls) == (2, 1, 2)
+        assert_no_leaks(routes)
+
+    asyncio.run(scenario())
+
+
+def test_wait_timeout_sheds_with_retry_after():
+    async def scenario():
+        routes = RouteClass("test", concurrency=1, max_queue=4, timeout=0.05)
+        handler = Handler()
+        running = asyncio.create_task(routes.run(handler))
+        await settle()
+
+        shed = await routes.run(handler)
+        assert shed.status_code == 503
+        assert shed.headers["retry-after"] == "1"
+        assert routes.queued == 0
+
+        handler.release.set()
+        assert (await running).status_code == 200
+        assert (routes.admitted, routes.shed, handler.calls) == (1, 1, 1)
+        assert_no_leaks(routes)
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_identical_requests_are_coalesced(streaming):
+    async def scenario():
+        routes = RouteClass("test", concurrency=1, max_queue=0, timeout=1)
+        handler = Handler(streaming=streaming)
+        tasks = [asyncio.create_task(routes.run_coalesced("/report", handler)) for _ in range(5)]
+        await settle()
+        handler.release.set()
+        responses = await asyncio.gather(*tasks)
+
+        assert handler.calls == 1
+        assert routes.coalesced == 4
+        assert {(r.status_code, r.body) for r in responses} == {(200, b'{"call": 1}' if streaming else b'{"call":1}')}
+        assert all(r.headers["content-type"] == "application/json" for r in responses)
+        assert_no_leaks(routes)
+
+    asyncio.run(scenario())
+
+
+def test_different_keys_are_not_coalesced():
+    async def scenario():
+        routes = RouteClass("test", concurrency=2, max_queue=0, timeout=1)
+        handler = Handler()
+        tasks = [asyncio.create_task(routes.run_coalesced(key, handler)) for key in ("/a", "/b")]
+        await settle()
+        handler.release.set()
+        await asyncio.gather(*tasks)
+        assert (handler.calls, routes.coalesced) == (2, 0)
+        assert_no_leaks(routes)
+
+    asyncio.run(scenario())
+
+
+def test_followers_run_independently_when_leader_fails():
+    async def scenario():
+        routes = RouteClass("test", concurrency=4, max_queue=4, timeout=1)
+        handler = Handler(fail_first=True)
+        leader = asyncio.create_task(routes.run_coalesced("/report", handler))
+        await settle()
+        followers = [asyncio.create_task(routes.run_coalesced("/report", handler)) for _ in range(3)]
+        await settle()
+        handler.release.set()
+
+        with pytest.raises(RuntimeError):
+            await leader
+        responses = await asyncio.gather(*followers)
+        assert [r.status_code for r in responses] == [200, 200, 200]
+        assert (handler.calls, routes.coalesced) == (4, 0)
+        assert_no_leaks(routes)
+
+    asyncio.run(scenario())
+
+
+def test_followers_run_independently_when_leader_cancelled():
+    async def scenario():
+        routes = RouteClass("test", concurrency=4, max_queue=4, timeout=1)
+        handler = Handler()
+        leader = asyncio.create_task(routes.run_coalesced("/report", handler))
+        await settle()
+        followers = [asyncio.create_task(routes.run_coalesced("/report", handler)) for _ in range(3)]
+        await settle()
+
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        handler.release.set()
+        responses = await asyncio.gather(*followers)
+        assert [r.status_code for r in responses] == [200, 200, 200]
+        assert (handler.calls, routes.coalesced) == (4, 0)
+        assert_no_leaks(routes)
+
+    asyncio.run(scenario())
+
+
+def test_slots_released_after_handler_error():
+    async def scenario():
+        routes = RouteClass("test", concurrency=1, max_queue=1, timeout=1)
+
+        async def broken():
+            raise RuntimeError("boom")
+
+        for _ in range(3):
+            with pytest.raises(RuntimeError):
+                await routes.run(broken)
+        assert routes.admitted == 3
+        assert_no_leaks(routes)
+
+    asyncio.run(scenario())
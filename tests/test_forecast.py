@@ -0,0 +1,151 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from app import forecast
+from app.models import CostArticle, CostCategory, CostTransaction, Reminder
+
+AS_OF = date(2025, 1, 31)
+UNTIL = AS_OF + timedelta(days=30)
+WINDOW = 30
+
+
+def add_transaction(db, article, day, amount):
+    db.add(CostTransaction(article=article, transaction_date=day, payment_method="Transferência", amount=amount))
+
+
+@pytest.fixture
+def obra(db):
+    """One category with four articles:
+
+    - "Paredes" overran on Jan 11 (40 + 70 > 100) and burns 70 / 30 per day;
+    - "Telhado" burns 3 per day and reaches its budget exactly on day 20;
+    - "Janelas" has a budget but no transactions;
+    - "Pintura" is exactly at budget on the as_of date and burns 1 per day.
+    """
+    category = CostCategory(name="Obra", budgeted_total=1000.0)
+    paredes = CostArticle(category=category, name="Paredes", budgeted_amount=100.0)
+    telhado = CostArticle(category=category, name="Telhado", budgeted_amount=150.0)
+    janelas = CostArticle(category=category, name="Janelas", budgeted_amount=50.0)
+    pintura = CostArticle(category=category, name="Pintura", budgeted_amount=30.0)
+    db.add_all([category, paredes, telhado, janelas, pintura])
+    add_transaction(db, paredes, date(2025, 1, 1), 40.0)
+    add_transaction(db, paredes, date(2025, 1, 11), 70.0)
+    add_transaction(db, telhado, date(2025, 1, 21), 90.0)
+    add_transaction(db, pintura, date(2025, 1, 31), 30.0)
+    add_transaction(db, pintura, date(2025, 2, 10), 500.0)  # after as_of: not seen yet
+    db.commit()
+    return {article.name: article.id for article in (paredes, telhado, janelas, pintura)}
+
+
+def by_name(items):
+    return {item["name"]: item for item in items}
+
+
+def get(client, **params):
+    params = {"as_of": AS_OF.isoformat(), "horizon_days": 30, "window_days": WINDOW, **params}
+    response = client.get("/api/costs/forecast", params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_known_values(client, obra):
+    result = get(client)
+    articles = by_name(result["articles"])
+
+    paredes = articles["Paredes"]
+    assert paredes["spent"] == 110.0
+    assert paredes["variance"] == -10.0
+    assert paredes["percent_consumed"] == 110.0
+    assert paredes["burn_rate_per_day"] == pytest.approx(70 / 30, abs=0.01)
+    assert paredes["overrun_date"] == "2025-01-11"
+
+    telhado = articles["Telhado"]
+    assert telhado["variance"] == 60.0
+    assert telhado["percent_consumed"] == 60.0
+    assert telhado["projected_cost"] == 180.0
+    assert telhado["overrun_date"] == "2025-02-21"  # at budget on day 20, over on day 21
+
+    (obra_category,) = result["categories"]
+    assert obra_category["spent"] == 230.0
+    assert obra_category["burn_rate_per_day"] == pytest.approx(70 / 30 + 3 + 1, abs=0.01)
+    assert obra_category["projected_cost"] == pytest.approx(230 + (70 / 30 + 4) * 30, abs=0.01)
+    assert obra_category["overrun_date"] is None
+
+
+def test_exactly_at_budget_overruns_the_next_day(client, obra):
+    pintura = by_name(get(client)["articles"])["Pintura"]
+    assert pintura["variance"] == 0.0
+    assert pintura["percent_consumed"] == 100.0
+    assert pintura["overrun_date"] == "2025-02-01"
+
+
+def test_article_without_transactions(client, obra):
+    janelas = by_name(get(client)["articles"])["Janelas"]
+    assert janelas["spent"] == 0.0
+    assert janelas["variance"] == 50.0
+    assert janelas["percent_consumed"] == 0.0
+    assert janelas["burn_rate_per_day"] == 0.0
+    assert janelas["projected_cost"] == 0.0
+    assert janelas["overrun_date"] is None
+
+
+def test_empty_database(client, db):
+    result = get(client)
+    assert result["categories"] == []
+    assert result["articles"] == []
+
+
+def test_scenario_scales_future_spend_only(client, obra):
+    base = by_name(get(client)["articles"])["Telhado"]
+    scenario = get(client, adjust="Obra:+50")
+    assert scenario["adjustments"] == {"Obra": 50.0}
+    telhado = by_name(scenario["articles"])["Telhado"]
+    assert telhado["spent"] == base["spent"]
+    assert telhado["burn_rate_per_day"] == 4.5
+    assert telhado["projected_cost"] == 90 + 4.5 * 30
+    assert telhado["overrun_date"] == "2025-02-14"  # 60 / 4.5 = 13.3 days left
+
+
+def test_unknown_category_is_rejected(client, obra):
+    response = client.get("/api/costs/forecast", params={"adjust": "Nope:+10"})
+    assert response.status_code == 422
+    assert response.json()["detail"] == "Unknown category: Nope"
+
+
+def test_cache_invalidated_by_cost_write(db, obra):
+    first = forecast.get_forecast(db, AS_OF, UNTIL, WINDOW, {})
+    assert forecast.get_forecast(db, AS_OF, UNTIL, WINDOW, {}) is first
+
+    add_transaction(db, db.get(CostArticle, obra["Janelas"]), date(2025, 1, 15), 20.0)
+    db.commit()
+    second = forecast.get_forecast(db, AS_OF, UNTIL, WINDOW, {})
+    assert second.frame.version > first.frame.version
+    assert second.article_spent.sum() == first.article_spent.sum() + 20.0
+
+
+def test_cache_kept_across_reminder_write(db, obra):
+    first = forecast.get_forecast(db, AS_OF, UNTIL, WINDOW, {})
+    db.add(Reminder(text="Ligar ao empreiteiro"))
+    db.commit()
+    assert forecast.get_forecast(db, AS_OF, UNTIL, WINDOW, {}) is first
+
+
+def test_rows_pointing_at_missing_articles_are_ignored(db, obra):
+    # SQLite does not enforce foreign keys, so orphans can exist.
+    db.add(CostTransaction(article_id=10**9, transaction_date=date(2025, 1, 5),
+                           payment_method="Dinheiro", amount=1.0))
+    db.commit()
+    frame = forecast.load_frame(db)
+    assert len(frame.txn_day) == 5
+    assert frame.article_id.tolist() == sorted(obra.values())
+
+
+def test_index_of_dense_and_sparse_ids():
+    values = np.array([5, 2, 7, -1, 10**12])
+    dense = np.array([1, 2, 5, 7])
+    sparse = np.array([2, 5, 7, 10**10])
+    assert forecast._index_of(dense, values).tolist() == [2, 1, 3, -1, -1]
+    assert forecast._index_of(sparse, values).tolist() == [1, 0, 2, -1, -1]
+    assert forecast._index_of(np.empty(0, dtype=np.int64), values).tolist() == [-1] * 5
@@ -0,0 +1,61 @@
+from datetime import date
+
+from app.models import CostArticle, CostCategory, CostTransaction, Reminder
+from app.routers import ui
+
+
+def add_transactions(db, count):
+    article = CostArticle(category=CostCategory(name="Obra"), name="Paredes")
+    db.add_all(
+        CostTransaction(article=article, transaction_date=date(2025, 1, 1), payment_method="Dinheiro", amount=10.0)
+        for _ in range(count)
+    )
+    db.commit()
+
+
+def test_format_eur():
+    assert ui.format_eur(1234.5) == "€1.234,50"
+    assert ui.format_eur(-1234.5) == "-€1.234,50"
+    assert ui.format_eur(-0.004) == "€0,00"
+    assert ui.format_eur(None) == "-"
+
+
+def test_out_of_range_page_redirects_to_last_without_caching(client, db):
+    add_transactions(db, ui.PAGE_SIZE + 1)
+    ui._fragments.clear()
+
+    response = client.get("/costs", params={"page": 99, "category_id": 1}, follow_redirects=False)
+    assert response.status_code == 303
+    assert response.headers["location"] == "/costs?category_id=1&page=2"
+    assert ui._fragments == {}
+
+    response = client.get(response.headers["location"])
+    assert response.status_code == 200
+    assert [key[1] for key in ui._fragments] == [(2, 1)]
+
+
+def test_fragment_cache_evicts_least_recently_used(db, monkeypatch):
+    monkeypatch.setattr(ui, "_MAX_FRAGMENTS", 2)
+    ui._fragments.clear()
+    renders = []
+
+    def render(page):
+        return ui.render_fragment(db, "fragments/pagination.html", (page,), lambda: renders.append(page) or {})
+
+    render(1), render(2), render(1), render(3)
+    assert [key[1] for key in ui._fragments] == [(1,), (3,)]
+    render(1)
+    render(2)
+    assert renders == [1, 2, 3, 2]
+
+
+def test_reminder_write_keeps_cost_fragments(client, db):
+    add_transactions(db, 1)
+    ui._fragments.clear()
+    client.get("/costs")
+    (key,) = ui._fragments
+
+    db.add(Reminder(text="Ligar ao empreiteiro"))
+    db.commit()
+    client.get("/costs")
+    assert list(ui._fragments) == [key]